@@ -0,0 +1,138 @@
+"""
+Shared miss/hit timing helpers for the live-server test scripts
+
+Latencies are taken from the X-Processing-Time-MS response header (server-side),
+with the client wall clock kept alongside as end-to-end time.
+"""
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+from _client import JSON_HEADERS, async_client, cache_delta, describe_cache_delta, encode_body, snapshot_stats
+
+
+def latency_summary(times: List[float]) -> Tuple[float, float, float, float]:
+    """Return (mean, p50, p95, p99) in ms for a list of latencies"""
+    if len(times) == 1:
+        return times[0], times[0], times[0], times[0]
+    cuts = statistics.quantiles(times, n=100, method='inclusive')
+    return statistics.fmean(times), cuts[49], cuts[94], cuts[98]
+
+
+def server_ms(response) -> float:
+    """Server-side processing time reported by the middleware"""
+    return float(response.headers["X-Processing-Time-MS"])
+
+
+def timed_post(session, url: str, body: bytes):
+    """POST a pre-encoded JSON body, returning (response, end-to-end ms)"""
+    start = time.perf_counter_ns()
+    response = session.post(url, data=body, headers=JSON_HEADERS)
+    return response, (time.perf_counter_ns() - start) / 1e6
+
+
+async def timed_posts(path: str, data: dict, count: int):
+    """
+    POST the same payload count times concurrently over one HTTP/2-capable client
+
+    Returns ((response, elapsed_ms) pairs, total elapsed_ms for the whole batch)
+    """
+    body = encode_body(data)
+
+    async def timed_async_post(client):
+        start = time.perf_counter_ns()
+        response = await client.post(path, content=body, headers=JSON_HEADERS)
+        return response, (time.perf_counter_ns() - start) / 1e6
+
+    async with async_client(http2=True) as client:
+        await client.get("/cache/stats")  # Warm-up: open the connection outside the timed batch
+        start = time.perf_counter_ns()
+        results = await asyncio.gather(*[timed_async_post(client) for _ in range(count)])
+        return results, (time.perf_counter_ns() - start) / 1e6
+
+
+@dataclass(frozen=True)
+class MeasureResult:
+    """One miss followed by n cache hits for the same payload"""
+    status_code: int  # Status of the first (miss) request
+    result: Any  # Decoded result of the miss, None if it failed
+    error: Optional[str]  # Response text if the miss failed
+    miss_ms: float  # Server-side
+    miss_e2e_ms: float
+    hit_ms: Tuple[float, ...]  # Server-side, successful hits only
+    hit_e2e_ms: Tuple[float, ...]
+    hit_ratio: Optional[float]  # From /cache/stats deltas; None if the operation bypasses the cache
+    speedup: Optional[float]
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    @property
+    def hit_p50_ms(self) -> Optional[float]:
+        return latency_summary(list(self.hit_ms))[1] if self.hit_ms else None
+
+    @property
+    def hit_p99_ms(self) -> Optional[float]:
+        return latency_summary(list(self.hit_ms))[3] if self.hit_ms else None
+
+    @property
+    def improvement_percent(self) -> Optional[float]:
+        """Server-side miss vs median hit"""
+        if not self.hit_ms or self.miss_ms <= 0:
+            return None
+        return (self.miss_ms - self.hit_p50_ms) / self.miss_ms * 100
+
+
+def measure(session, base: str, endpoint: str, data: dict, n_hits: int = 3) -> MeasureResult:
+    """
+    Time one request (cache miss) and n_hits repeats (cache hits) of the same payload
+
+    Args:
+        session: requests.Session to send with
+        base: API base URL
+        endpoint: Operation path, e.g. "power"
+        data: JSON payload
+        n_hits: Number of repeat requests after the miss
+
+    Returns:
+        MeasureResult with server-side and end-to-end latencies plus hit ratio/speedup
+    """
+    url = f"{base}/{endpoint}"
+    body = encode_body(data)
+    stats_before = snapshot_stats()
+
+    miss, miss_e2e = timed_post(session, url, body)
+    hits = [timed_post(session, url, body) for _ in range(n_hits)] if miss.status_code == 200 else []
+
+    delta = cache_delta(stats_before, snapshot_stats())
+    hit_ratio, speedup = delta if delta else (None, None)
+    successful_hits = [(response, e2e) for response, e2e in hits if response.status_code == 200]
+
+    return MeasureResult(
+        status_code=miss.status_code,
+        result=miss.json()['result'] if miss.status_code == 200 else None,
+        error=None if miss.status_code == 200 else miss.text,
+        miss_ms=server_ms(miss),
+        miss_e2e_ms=miss_e2e,
+        hit_ms=tuple(server_ms(response) for response, _ in successful_hits),
+        hit_e2e_ms=tuple(e2e for _, e2e in successful_hits),
+        hit_ratio=hit_ratio,
+        speedup=speedup
+    )
+
+
+def print_measure(m: MeasureResult, indent: str = "  ") -> None:
+    """Print a MeasureResult: miss and hit latencies, result, improvement and cache hit ratio"""
+    if not m.ok:
+        print(f"{indent}Failed: {m.status_code} - {m.error}")
+        return
+
+    print(f"{indent}{'Miss (first request):':<24}{m.miss_ms:.3f}ms server ({m.miss_e2e_ms:.2f}ms end-to-end)")
+    for i, (hit_ms, hit_e2e_ms) in enumerate(zip(m.hit_ms, m.hit_e2e_ms), 1):
+        print(f"{indent}{f'Hit #{i} (cached):':<24}{hit_ms:.3f}ms server ({hit_e2e_ms:.2f}ms end-to-end)")
+    print(f"{indent}Result: {m.result}")
+    if m.improvement_percent is not None:
+        print(f"{indent}Speed improvement: {m.improvement_percent:.1f}%")
+    print(f"{indent}{describe_cache_delta(None if m.hit_ratio is None else (m.hit_ratio, m.speedup))}")
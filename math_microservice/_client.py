@@ -0,0 +1,110 @@
+"""
+Shared HTTP client for the live-server test scripts
+
+All test modules import the same pooled session, so one urllib3
+connection pool serves the whole test run.
+"""
+import atexit
+import json
+import sys
+import httpx
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "http://127.0.0.1:8000/api/v1/math"
+
+# Send with data=encode_body(...) to keep json.dumps out of timed loops
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# (connect, read) seconds - bounds every call so a stuck server cannot hang the run
+TIMEOUT = (1.0, 5.0)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies TIMEOUT to any request sent without an explicit timeout"""
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=TIMEOUT if timeout is None else timeout, **kwargs)
+
+
+session = requests.Session()
+session.mount("http://", TimeoutHTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0))
+atexit.register(session.close)
+
+
+def decode_json(response):
+    """
+    Decode a response body with orjson
+
+    Only for stats-style payloads: orjson turns integers wider than 64 bits into
+    floats, so math results (big fibonacci/factorial values) must use response.json().
+    """
+    return orjson.loads(response.content)
+
+
+def encode_body(data: dict) -> bytes:
+    """Serialize a JSON request body once, ahead of the timed region"""
+    return json.dumps(data).encode("utf-8")
+
+
+def async_client(http2: bool = False) -> httpx.AsyncClient:
+    """
+    Keep-alive async client for firing independent requests concurrently
+
+    With http2=True requests are multiplexed over one connection when the server
+    negotiates HTTP/2 (ALPN over TLS); plain-http uvicorn falls back to HTTP/1.1.
+    """
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=http2,
+        timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0]),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+
+
+def preflight() -> None:
+    """Exit with a clear message if the server is not reachable, before any test runs"""
+    try:
+        session.get(f"{BASE_URL}/health", timeout=1.0).raise_for_status()
+    except requests.RequestException as e:
+        sys.exit(
+            f"Cannot reach the API at {BASE_URL} ({type(e).__name__}). Make sure the server is running:\n"
+            "   uvicorn app.main:app --reload"
+        )
+
+
+def warm_up() -> None:
+    """Discarded request that opens the pooled connection before any timed region"""
+    session.get(f"{BASE_URL}/cache/stats")
+
+
+def snapshot_stats() -> dict:
+    """Current server cache counters from /cache/stats"""
+    return decode_json(session.get(f"{BASE_URL}/cache/stats"))['cache_statistics']
+
+
+def cache_delta(before: dict, after: dict):
+    """
+    Hit ratio and speedup between two snapshot_stats() results
+
+    Hitratio = h / (h + m), Speedup = 1 + h / m over the hits and misses in between.
+    Returns None when no cache lookups happened (operations that bypass the cache).
+    """
+    hits = after['hits'] - before['hits']
+    misses = after['misses'] - before['misses']
+    if hits + misses == 0:
+        return None
+    return hits / (hits + misses), 1 + hits / max(misses, 1)
+
+
+def describe_cache_delta(delta) -> str:
+    """One-line summary of a cache_delta() result"""
+    if delta is None:
+        return "Cache: no lookups (operation is not served from the response cache)"
+    return f"Cache: hit ratio {delta[0]:.2f}, speedup {delta[1]:.2f}x"
+
+
+def print_cache_delta(before: dict, after: dict, indent: str = "  ") -> None:
+    """Print the hit ratio and speedup between two snapshots"""
+    print(f"{indent}{describe_cache_delta(cache_delta(before, after))}")
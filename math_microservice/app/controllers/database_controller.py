@@ -1,70 +1,100 @@
 """
 Database operations controller
 """
-import json
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, insert, desc, func, lambda_stmt, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
+from app.database import json_serializer
 from app.models.database_models import ApiRequest, OperationStats
 from datetime import datetime
 
+# Batches at least this large use COPY on asyncpg; smaller ones use executemany INSERT
+COPY_MIN_ROWS = 100
+_COPY_COLUMNS = ['operation', 'input_data', 'result', 'success', 'error_message', 'execution_time_ms']
+
+# Parameterless statements built once at import
+_OPERATION_STATS_STMT = select(OperationStats)
+
+
+def _cursor_timestamp(request_id: int):
+    """Scalar subquery for the timestamp of the request used as pagination cursor"""
+    return select(ApiRequest.timestamp).where(ApiRequest.id == request_id).scalar_subquery()
+
 
 class DatabaseController:
     """Controller for database operations"""
 
     @staticmethod
-    async def save_api_request(
-            db: AsyncSession,
-            operation: str,
-            input_data: dict,
-            result: Optional[float] = None,
-            success: bool = True,
-            error_message: Optional[str] = None,
-            execution_time_ms: Optional[float] = None
-    ) -> ApiRequest:
+    async def save_api_requests_bulk(db: AsyncSession, items: List[Dict[str, Any]]) -> int:
         """
-        Save an API request to the database
+        Save many API requests with a single executemany INSERT (COPY for large batches on asyncpg)
 
         Args:
             db: Database session
-            operation: Type of operation (power, fibonacci, factorial)
-            input_data: Input parameters as dictionary
-            result: Calculation result
-            success: Whether operation was successful
-            error_message: Error message if failed
-            execution_time_ms: Time taken to execute
+            items: Request dictionaries with operation and input_data, plus optional
+                   result, success, error_message and execution_time_ms
 
         Returns:
-            Created ApiRequest record
+            Number of records saved
         """
-        api_request = ApiRequest(
-            operation=operation,
-            input_data=json.dumps(input_data),
-            result=result,
-            success=success,
-            error_message=error_message,
-            execution_time_ms=execution_time_ms
-        )
+        if not items:
+            return 0
+
+        rows = [
+            {
+                'operation': item['operation'],
+                'input_data': item['input_data'],
+                'result': str(item['result']) if item.get('result') is not None else None,
+                'success': item.get('success', True),
+                'error_message': item.get('error_message'),
+                'execution_time_ms': item.get('execution_time_ms')
+            }
+            for item in items
+        ]
+
+        # Aggregate statistics so each operation gets one UPSERT per batch
+        totals: Dict[str, List] = {}
+        for row in rows:
+            counts = totals.setdefault(row['operation'], [0, 0, 0.0])
+            counts[0] += 1
+            counts[1] += 1 if row['success'] else 0
+            counts[2] += row['execution_time_ms'] or 0.0
+
+        async with db.begin():
+            if len(rows) >= COPY_MIN_ROWS and db.bind.dialect.driver == "asyncpg":
+                await DatabaseController._copy_api_requests(db, rows)
+            else:
+                await db.execute(insert(ApiRequest), rows)
 
-        db.add(api_request)
-        await db.commit()
-        await db.refresh(api_request)
+            for operation, (requests, successful, execution_time_ms) in totals.items():
+                await DatabaseController._update_operation_stats(
+                    db, operation, requests, successful, execution_time_ms
+                )
 
-        # Update operation statistics
-        await DatabaseController._update_operation_stats(
-            db, operation, success, execution_time_ms or 0.0
-        )
+        return len(rows)
 
-        return api_request
+    @staticmethod
+    def parse_result(value: Optional[Union[str, float]]) -> Optional[Union[int, float]]:
+        """Convert a stored result back to a number (legacy REAL rows pass through)"""
+        if not isinstance(value, str):
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
 
     @staticmethod
     async def get_api_requests(
             db: AsyncSession,
             operation: Optional[str] = None,
             limit: int = 100,
-            offset: int = 0
-    ) -> List[ApiRequest]:
+            offset: int = 0,
+            before_id: Optional[int] = None
+    ) -> List[Row]:
         """
         Get API requests from database
 
@@ -72,63 +102,115 @@ class DatabaseController:
             db: Database session
             operation: Filter by operation type (optional)
             limit: Maximum number of records to return
-            offset: Number of records to skip
+            offset: Number of records to skip (ignored when before_id is given)
+            before_id: Keyset cursor - only return records older than this request id
 
         Returns:
-            List of ApiRequest records
+            List of rows holding only the columns used by the history view
         """
-        query = select(ApiRequest).order_by(desc(ApiRequest.timestamp))
+        # Select plain columns - avoids building full ORM entities per row.
+        # lambda_stmt caches the compiled SQL, so repeat calls only bind parameters.
+        query = lambda_stmt(lambda: select(
+            ApiRequest.id,
+            ApiRequest.operation,
+            ApiRequest.input_data,
+            ApiRequest.result,
+            ApiRequest.success,
+            ApiRequest.error_message,
+            ApiRequest.timestamp,
+            ApiRequest.execution_time_ms
+        ).order_by(desc(ApiRequest.timestamp), desc(ApiRequest.id)))
 
         if operation:
-            query = query.where(ApiRequest.operation == operation)
+            query += lambda q: q.where(ApiRequest.operation == operation)
 
-        query = query.limit(limit).offset(offset)
+        if before_id is not None:
+            # Keyset pagination - the row-value comparison lets the (timestamp, id) index seek
+            # straight to the cursor; the equivalent OR form makes SQLite walk every newer row
+            query += lambda q: q.where(
+                tuple_(ApiRequest.timestamp, ApiRequest.id) < tuple_(_cursor_timestamp(before_id), before_id)
+            )
+            query += lambda q: q.limit(limit)
+        else:
+            query += lambda q: q.limit(limit).offset(offset)
         result = await db.execute(query)
-        return result.scalars().all()
+        return result.all()
+
+    @staticmethod
+    async def count_api_requests(db: AsyncSession, operation: Optional[str] = None) -> int:
+        """Count stored API requests, optionally filtered by operation type"""
+        query = lambda_stmt(lambda: select(func.count()).select_from(ApiRequest))
+
+        if operation:
+            query += lambda q: q.where(ApiRequest.operation == operation)
+
+        result = await db.execute(query)
+        return result.scalar_one()
 
     @staticmethod
     async def get_operation_stats(db: AsyncSession) -> List[OperationStats]:
         """Get operation statistics"""
-        result = await db.execute(select(OperationStats))
+        result = await db.execute(_OPERATION_STATS_STMT)
         return result.scalars().all()
 
+    @staticmethod
+    async def _copy_api_requests(db: AsyncSession, rows: List[Dict[str, Any]]):
+        """Stream rows into api_requests with Postgres COPY (asyncpg only, caller commits)"""
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            ApiRequest.__tablename__,
+            records=[
+                (
+                    row['operation'],
+                    json_serializer(row['input_data']),
+                    row['result'],
+                    row['success'],
+                    row['error_message'],
+                    row['execution_time_ms']
+                )
+                for row in rows
+            ],
+            columns=_COPY_COLUMNS
+        )
+
     @staticmethod
     async def _update_operation_stats(
             db: AsyncSession,
             operation: str,
-            success: bool,
+            requests: int,
+            successful: int,
             execution_time_ms: float
     ):
-        """Update operation statistics (internal method)"""
-        # Check if stats record exists
-        result = await db.execute(
-            select(OperationStats).where(OperationStats.operation == operation)
-        )
-        stats = result.scalar_one_or_none()
-
-        if not stats:
-            # Create new stats record
-            stats = OperationStats(
-                operation=operation,
-                total_requests=1,
-                successful_requests=1 if success else 0,
-                failed_requests=0 if success else 1,
-                avg_execution_time_ms=execution_time_ms
-            )
-            db.add(stats)
-        else:
-            # Update existing stats
-            stats.total_requests += 1
-            if success:
-                stats.successful_requests += 1
-            else:
-                stats.failed_requests += 1
-
-            # Update average execution time
-            if stats.total_requests > 1:
-                current_total_time = stats.avg_execution_time_ms * (stats.total_requests - 1)
-                stats.avg_execution_time_ms = (current_total_time + execution_time_ms) / stats.total_requests
-            else:
-                stats.avg_execution_time_ms = execution_time_ms
+        """
+        Update operation statistics (internal method, caller commits)
 
-        await db.commit()
\ No newline at end of file
+        Args:
+            db: Database session
+            operation: Type of operation
+            requests: Number of new requests to record
+            successful: How many of them succeeded
+            execution_time_ms: Summed execution time of the new requests
+        """
+        # Single atomic UPSERT - no read-modify-write round-trip
+        dialect_insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = dialect_insert(OperationStats).values(
+            operation=operation,
+            total_requests=requests,
+            successful_requests=successful,
+            failed_requests=requests - successful,
+            avg_execution_time_ms=execution_time_ms / requests
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OperationStats.operation],
+            set_={
+                'total_requests': OperationStats.total_requests + requests,
+                'successful_requests': OperationStats.successful_requests + successful,
+                'failed_requests': OperationStats.failed_requests + (requests - successful),
+                'avg_execution_time_ms': (
+                    OperationStats.avg_execution_time_ms * OperationStats.total_requests + execution_time_ms
+                ) / (OperationStats.total_requests + requests),
+                'last_updated': func.now()
+            }
+        )
+        await db.execute(stmt)
@@ -2,11 +2,45 @@
 Mathematical operations controller with caching support
 Contains the business logic for all math operations
 """
+import logging
 import math
-from typing import Union, Dict, Any
+import operator
+from functools import lru_cache
+from itertools import accumulate
+from typing import Union, Tuple
+try:
+    import gmpy2
+except ImportError:  # Optional - fall back to pure Python fast doubling
+    gmpy2 = None
 from app.utils.cache import math_cache
 from app.utils.exceptions import MathOperationError
-from app.utils.logger import app_logger, cache_logger
+from app.utils.logger import app_logger
+
+# n! for every n in the supported domain (0..170), computed once at import
+_FACTORIAL_TABLE = tuple(accumulate(range(1, 171), operator.mul, initial=1))
+
+
+def _fibonacci_pair(n: int) -> Tuple[int, int]:
+    """
+    Return (F(n), F(n+1)) using iterative fast doubling - O(log n) big-int multiplications
+
+    F(2k) = F(k) * (2*F(k+1) - F(k))
+    F(2k+1) = F(k)^2 + F(k+1)^2
+    """
+    a, b = 0, 1
+    for bit in bin(n)[2:]:  # Most significant bit first
+        c = a * ((b << 1) - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == "1" else (c, d)
+    return a, b
+
+
+@lru_cache(maxsize=4096)
+def _fibonacci(n: int) -> int:
+    """Memoized F(n) - lru_cache keys on n directly, no math_cache key building"""
+    if gmpy2 is not None:
+        return int(gmpy2.fib(n))  # GMP's native routine
+    return _fibonacci_pair(n)[0]
 
 
 class MathController:
@@ -28,51 +62,73 @@ class MathController:
             MathOperationError: If calculation fails or results in overflow
         """
         operation = "power"
-        params = {"base": base, "exponent": exponent}
+        # int and float operands hash equal (2 == 2.0), so type names are part of the key
+        key = (operation, base, exponent, type(base).__name__, type(exponent).__name__)
 
-        # Check cache first
-        try:
-            cached_result = math_cache.get(operation, params)
-            if cached_result is not None:
-                cache_logger.debug("Cache hit for power calculation", extra={
-                    'base': base,
-                    'exponent': exponent,
-                    'result': cached_result,
-                    'calculation_time_saved': True
-                })
-                return cached_result
-        except Exception as e:
-            cache_logger.warning("Cache get failed for power", extra={'error': str(e)})
+        # Check cache first - hits return straight away (MathCache logs the hit itself)
+        cached_result = math_cache.get(key)
+        if cached_result is not None:
+            return cached_result
 
         # Perform calculation
         try:
-            result = base ** exponent
+            # Reject invalid or oversized results before doing the exponentiation
+            if base == 0:
+                if exponent < 0:
+                    raise MathOperationError(
+                        operation=operation,
+                        message="Invalid calculation: zero cannot be raised to a negative power",
+                        input_data={"base": base, "exponent": exponent}
+                    )
+            elif base < 0 and isinstance(exponent, float) and not exponent.is_integer():
+                raise MathOperationError(
+                    operation=operation,
+                    message="Invalid calculation: negative base with a fractional exponent has no real result",
+                    input_data={"base": base, "exponent": exponent}
+                )
+
+            if base in (0, 1, -1):
+                # |result| is 0 or 1, so the log10 bound does not apply. An int exponent only matters
+                # through its sign and parity - reduce it so huge ints never reach a float conversion
+                if isinstance(exponent, int) and exponent:
+                    result = pow(base, (2 - exponent % 2) * (1 if exponent > 0 else -1))
+                else:
+                    result = pow(base, exponent)
+            else:
+                try:
+                    magnitude = exponent * math.log10(abs(base))  # log10 of the result's magnitude
+                except OverflowError:
+                    # Exponent too large for a float - only the sign of the estimate matters
+                    magnitude = math.inf if (exponent > 0) == (abs(base) > 1) else -math.inf
+
+                if magnitude > 100:
+                    raise MathOperationError(
+                        operation=operation,
+                        message="Result too large - calculation would cause overflow",
+                        input_data={"base": base, "exponent": exponent}
+                    )
+                # Builtin pow - binary exponentiation for ints. Below float range the result
+                # underflows to zero, as float pow would
+                result = 0.0 if magnitude == -math.inf else pow(base, exponent)
 
             # Check for infinity or very large numbers
             if math.isinf(result) or abs(result) > 1e100:
                 raise MathOperationError(
                     operation=operation,
                     message="Result too large - calculation would cause overflow",
-                    input_data=params
+                    input_data={"base": base, "exponent": exponent}
                 )
 
-            # Cache the result
-            try:
-                math_cache.set(operation, params, result)
-                cache_logger.debug("Cached power calculation result", extra={
+            # Cache the result (MathCache logs the set)
+            math_cache.set(key, result)
+
+            if app_logger.isEnabledFor(logging.DEBUG):
+                app_logger.debug("Power calculation completed", extra={
                     'base': base,
                     'exponent': exponent,
-                    'result': result
+                    'result': result,
+                    'cached': False
                 })
-            except Exception as e:
-                cache_logger.warning("Cache set failed for power", extra={'error': str(e)})
-
-            app_logger.debug("Power calculation completed", extra={
-                'base': base,
-                'exponent': exponent,
-                'result': result,
-                'cached': False
-            })
 
             return result
 
@@ -80,19 +136,19 @@ class MathController:
             raise MathOperationError(
                 operation=operation,
                 message="Calculation overflow - numbers too large to compute",
-                input_data=params
+                input_data={"base": base, "exponent": exponent}
             )
         except (ValueError, ArithmeticError) as e:
             raise MathOperationError(
                 operation=operation,
                 message=f"Invalid calculation: {str(e)}",
-                input_data=params
+                input_data={"base": base, "exponent": exponent}
             )
 
     @staticmethod
     def calculate_fibonacci(n: int) -> int:
         """
-        Calculate the nth Fibonacci number using iterative approach with caching
+        Calculate the nth Fibonacci number using memoized fast doubling
 
         Args:
             n: Position in Fibonacci sequence (0-indexed)
@@ -107,77 +163,29 @@ class MathController:
             F(0) = 0, F(1) = 1, F(n) = F(n-1) + F(n-2)
         """
         operation = "fibonacci"
-        params = {"n": n}
 
         # Validate input
         if n < 0:
             raise MathOperationError(
                 operation=operation,
                 message="Fibonacci sequence is not defined for negative numbers",
-                input_data=params
+                input_data={"n": n}
             )
 
         if n > 1000:  # Prevent extremely large calculations
             raise MathOperationError(
                 operation=operation,
                 message="Fibonacci calculation limited to n <= 1000 for performance reasons",
-                input_data=params
+                input_data={"n": n}
             )
 
-        # Check cache first
-        try:
-            cached_result = math_cache.get(operation, params)
-            if cached_result is not None:
-                cache_logger.debug("Cache hit for fibonacci calculation", extra={
-                    'n': n,
-                    'result': cached_result
-                })
-                return int(cached_result)
-        except Exception as e:
-            cache_logger.warning("Cache get failed for fibonacci", extra={'error': str(e)})
-
-        # Perform calculation
-        try:
-            if n == 0:
-                result = 0
-            elif n == 1:
-                result = 1
-            else:
-                # Iterative approach for better performance
-                a, b = 0, 1
-                for _ in range(2, n + 1):
-                    a, b = b, a + b
-                result = b
-
-            # Cache the result
-            try:
-                math_cache.set(operation, params, result)
-                cache_logger.debug("Cached fibonacci calculation result", extra={
-                    'n': n,
-                    'result': result
-                })
-            except Exception as e:
-                cache_logger.warning("Cache set failed for fibonacci", extra={'error': str(e)})
-
-            app_logger.debug("Fibonacci calculation completed", extra={
-                'n': n,
-                'result': result,
-                'cached': False
-            })
-
-            return result
-
-        except Exception as e:
-            raise MathOperationError(
-                operation=operation,
-                message=f"Fibonacci calculation failed: {str(e)}",
-                input_data=params
-            )
+        # Memoized by lru_cache - bypasses math_cache entirely
+        return _fibonacci(n)
 
     @staticmethod
     def calculate_factorial(n: int) -> int:
         """
-        Calculate factorial of n (n!) with caching
+        Calculate factorial of n (n!) from a precomputed table
 
         Args:
             n: Non-negative integer
@@ -192,74 +200,21 @@ class MathController:
             0! = 1 by definition
         """
         operation = "factorial"
-        params = {"n": n}
 
         # Validate input
         if n < 0:
             raise MathOperationError(
                 operation=operation,
                 message="Factorial is not defined for negative numbers",
-                input_data=params
+                input_data={"n": n}
             )
 
         if n > 170:  # Factorial of 171 overflows in most systems
             raise MathOperationError(
                 operation=operation,
                 message="Factorial calculation limited to n <= 170 to prevent overflow",
-                input_data=params
+                input_data={"n": n}
             )
 
-        # Check cache first
-        try:
-            cached_result = math_cache.get(operation, params)
-            if cached_result is not None:
-                cache_logger.debug("Cache hit for factorial calculation", extra={
-                    'n': n,
-                    'result': cached_result
-                })
-                return int(cached_result)
-        except Exception as e:
-            cache_logger.warning("Cache get failed for factorial", extra={'error': str(e)})
-
-        # Perform calculation
-        try:
-            if n == 0 or n == 1:
-                result = 1
-            else:
-                result = 1
-                for i in range(2, n + 1):
-                    result *= i
-                    # Additional safety check for extremely large numbers
-                    if result > 1e100:
-                        raise MathOperationError(
-                            operation=operation,
-                            message="Factorial result too large",
-                            input_data=params
-                        )
-
-            # Cache the result
-            try:
-                math_cache.set(operation, params, result)
-                cache_logger.debug("Cached factorial calculation result", extra={
-                    'n': n,
-                    'result': result
-                })
-            except Exception as e:
-                cache_logger.warning("Cache set failed for factorial", extra={'error': str(e)})
-
-            app_logger.debug("Factorial calculation completed", extra={
-                'n': n,
-                'result': result,
-                'cached': False
-            })
-
-            return result
-
-        except Exception as e:
-            if isinstance(e, MathOperationError):
-                raise
-            raise MathOperationError(
-                operation=operation,
-                message=f"Factorial calculation failed: {str(e)}",
-                input_data=params
-            )
\ No newline at end of file
+        # The whole valid domain is precomputed - a lookup beats caching
+        return _FACTORIAL_TABLE[n]
@@ -8,6 +8,7 @@ from pydantic import ValidationError
 
 from app.routes.math_routes import router as math_router
 from app.database import DatabaseManager
+from app.utils.db_writer import request_writer
 
 # Import middleware and exception handlers
 from app.utils.middleware import RequestLoggingMiddleware, CacheMetricsMiddleware
@@ -16,7 +17,7 @@ from app.utils.exceptions import (
     math_operation_exception_handler, cache_exception_handler,
     validation_exception_handler, http_exception_handler, general_exception_handler
 )
-from app.utils.logger import app_logger
+from app.utils.logger import app_logger, start_log_listener, stop_log_listener
 
 
 @asynccontextmanager
@@ -26,20 +27,26 @@ async def lifespan(app: FastAPI):
     Handles startup and shutdown events
     """
     # Startup
+    start_log_listener()
     app_logger.info("Starting Math Microservice...")
     await DatabaseManager.init_database()
     app_logger.info("Database initialized successfully")
+    request_writer.start()
 
     # Initialize cache
     from app.utils.cache import math_cache
+    math_cache.start_sweeper()
     app_logger.info("Cache initialized", extra=math_cache.get_stats())
 
     yield
 
     # Shutdown
     app_logger.info("Shutting down Math Microservice...")
+    await request_writer.stop()
+    await math_cache.stop_sweeper()
     await DatabaseManager.close_database()
     app_logger.info("Math Microservice shutdown complete")
+    stop_log_listener()
 
 
 # Create FastAPI instance
@@ -115,5 +122,14 @@ async def root():
 
 # This allows running with: python -m app.main
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        "app.main:app" if workers > 1 else app,  # Multiple workers need an import string
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",  # uvloop when installed (uvicorn[standard], not on Windows), else asyncio
+        http="auto",  # httptools when installed, else h11
+        workers=workers
+    )
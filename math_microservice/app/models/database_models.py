@@ -1,7 +1,7 @@
 """
 SQLAlchemy database models
 """
-from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, JSON, Index, desc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -14,11 +14,16 @@ class ApiRequest(Base):
     Model to store all API requests and responses
     """
     __tablename__ = "api_requests"
+    __table_args__ = (
+        # History queries filter by operation and page newest-first (id breaks timestamp ties)
+        Index("ix_api_requests_op_ts", "operation", desc("timestamp"), desc("id")),
+        Index("ix_api_requests_ts", desc("timestamp"), desc("id")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     operation = Column(String(50), nullable=False, index=True)
-    input_data = Column(Text, nullable=False)  # JSON string of input parameters
-    result = Column(Float, nullable=True)  # Calculation result
+    input_data = Column(JSON, nullable=False)  # Input parameters, serialized by the driver's JSON codec
+    result = Column(Text, nullable=True)  # Calculation result as text - big integers stay exact
     success = Column(Boolean, default=True, nullable=False)
     error_message = Column(Text, nullable=True)  # Error message if operation failed
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,28 +1,36 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, Field
-from typing import Union, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Union, List, Optional
 
 
 class PowerRequest(BaseModel):
     """Request model for power operation"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     base: Union[int, float] = Field(..., description="Base number")
     exponent: Union[int, float] = Field(..., description="Exponent")
 
 
 class FibonacciRequest(BaseModel):
     """Request model for fibonacci operation"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     n: int = Field(..., ge=0, description="Position in fibonacci sequence (non-negative)")
 
 
 class FactorialRequest(BaseModel):
     """Request model for factorial operation"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     n: int = Field(..., ge=0, description="Number to calculate factorial (non-negative)")
 
 
 class MathResponse(BaseModel):
     """Response model for all math operations"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     operation: str = Field(..., description="Type of operation performed")
     input_values: dict = Field(..., description="Input parameters used")
     result: Union[int, float] = Field(..., description="Calculation result")
@@ -31,6 +39,8 @@ class MathResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Response model for errors"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     error: str = Field(..., description="Error message")
     operation: str = Field(..., description="Operation that failed")
     success: bool = Field(default=False, description="Always false for errors")
@@ -38,21 +48,22 @@ class ErrorResponse(BaseModel):
 
 class ApiRequestHistory(BaseModel):
     """Response model for API request history"""
+    model_config = ConfigDict(frozen=True, extra="ignore", from_attributes=True)
+
     id: int
     operation: str
-    input_data: str  # JSON string
-    result: Union[float, None]
+    input_data: dict
+    result: Union[int, float, None]
     success: bool
     error_message: Union[str, None]
     timestamp: str  # ISO format datetime string
     execution_time_ms: Union[float, None]
 
-    class Config:
-        from_attributes = True  # Allows creation from SQLAlchemy models
-
 
 class OperationStatsResponse(BaseModel):
     """Response model for operation statistics"""
+    model_config = ConfigDict(frozen=True, extra="ignore", from_attributes=True)
+
     operation: str
     total_requests: int
     successful_requests: int
@@ -61,13 +72,13 @@ class OperationStatsResponse(BaseModel):
     avg_execution_time_ms: float
     last_updated: str
 
-    class Config:
-        from_attributes = True
-
 
 class HistoryResponse(BaseModel):
     """Response model for history endpoint"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     total_records: int
     page: int
     page_size: int
-    requests: List[ApiRequestHistory]
\ No newline at end of file
+    requests: List[ApiRequestHistory]
+    next_cursor: Optional[int] = None  # Pass as before_id to fetch the next page
\ No newline at end of file
@@ -3,8 +3,9 @@ API routes for mathematical operations
 """
 import time
 import json
+import orjson
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.schemas import (
     PowerRequest, FibonacciRequest, FactorialRequest,
@@ -13,9 +14,11 @@ from app.models.schemas import (
 )
 from app.controllers.math_controller import MathController
 from app.controllers.database_controller import DatabaseController
-from app.database import get_db
+from app.database import get_read_db
 from app.utils.cache import math_cache
+from app.utils.db_writer import request_writer
 from app.utils.logger import api_logger
+from app.utils.responses import ORJSONResponse
 
 # Create router instance
 router = APIRouter(prefix="/api/v1/math", tags=["Mathematics"])
@@ -23,9 +26,15 @@ router = APIRouter(prefix="/api/v1/math", tags=["Mathematics"])
 # Initialize controller
 math_controller = MathController()
 
+# response_model routes keep FastAPI's default response class, which serializes through Pydantic's
+# dump_json fast path; the model-less dict routes below render with orjson instead
+
+# Static health payload, encoded once at import
+_HEALTH_BYTES = orjson.dumps({"status": "healthy", "service": "math-microservice"})
+
 
 @router.post("/power", response_model=MathResponse)
-async def calculate_power(request: PowerRequest, db: AsyncSession = Depends(get_db)):
+async def calculate_power(request: PowerRequest):
     """
     Calculate base raised to the power of exponent
 
@@ -34,22 +43,21 @@ async def calculate_power(request: PowerRequest, db: AsyncSession = Depends(get_
         {"base": 2, "exponent": 3}
         Returns: {"operation": "power", "input_values": {"base": 2, "exponent": 3}, "result": 8, "success": true}
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     input_data = {"base": request.base, "exponent": request.exponent}
 
     try:
         result = math_controller.calculate_power(request.base, request.exponent)
-        execution_time_ms = (time.time() - start_time) * 1000
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
 
-        # Save to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="power",
-            input_data=input_data,
-            result=result,
-            success=True,
-            execution_time_ms=execution_time_ms
-        )
+        # Queue for the background database writer
+        request_writer.enqueue({
+            'operation': "power",
+            'input_data': input_data,
+            'result': result,
+            'success': True,
+            'execution_time_ms': execution_time_ms
+        })
 
         api_logger.info("Power calculation successful", extra={
             'base': request.base,
@@ -58,30 +66,29 @@ async def calculate_power(request: PowerRequest, db: AsyncSession = Depends(get_
             'execution_time_ms': round(execution_time_ms, 3)
         })
 
-        return MathResponse(
+        return MathResponse.model_construct(
             operation="power",
             input_values=input_data,
             result=result
         )
     except Exception as e:
-        execution_time_ms = (time.time() - start_time) * 1000
-
-        # Save failed request to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="power",
-            input_data=input_data,
-            success=False,
-            error_message=str(e),
-            execution_time_ms=execution_time_ms
-        )
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
+
+        # Queue failed request for the background database writer
+        request_writer.enqueue({
+            'operation': "power",
+            'input_data': input_data,
+            'success': False,
+            'error_message': str(e),
+            'execution_time_ms': execution_time_ms
+        })
 
         # Re-raise to let exception handlers deal with it
         raise
 
 
 @router.post("/fibonacci", response_model=MathResponse)
-async def calculate_fibonacci(request: FibonacciRequest, db: AsyncSession = Depends(get_db)):
+async def calculate_fibonacci(request: FibonacciRequest):
     """
     Calculate the nth Fibonacci number
 
@@ -90,22 +97,21 @@ async def calculate_fibonacci(request: FibonacciRequest, db: AsyncSession = Depe
         {"n": 10}
         Returns: {"operation": "fibonacci", "input_values": {"n": 10}, "result": 55, "success": true}
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     input_data = {"n": request.n}
 
     try:
         result = math_controller.calculate_fibonacci(request.n)
-        execution_time_ms = (time.time() - start_time) * 1000
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
 
-        # Save to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="fibonacci",
-            input_data=input_data,
-            result=result,
-            success=True,
-            execution_time_ms=execution_time_ms
-        )
+        # Queue for the background database writer
+        request_writer.enqueue({
+            'operation': "fibonacci",
+            'input_data': input_data,
+            'result': result,
+            'success': True,
+            'execution_time_ms': execution_time_ms
+        })
 
         api_logger.info("Fibonacci calculation successful", extra={
             'n': request.n,
@@ -113,30 +119,29 @@ async def calculate_fibonacci(request: FibonacciRequest, db: AsyncSession = Depe
             'execution_time_ms': round(execution_time_ms, 3)
         })
 
-        return MathResponse(
+        return MathResponse.model_construct(
             operation="fibonacci",
             input_values=input_data,
             result=result
         )
     except Exception as e:
-        execution_time_ms = (time.time() - start_time) * 1000
-
-        # Save failed request to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="fibonacci",
-            input_data=input_data,
-            success=False,
-            error_message=str(e),
-            execution_time_ms=execution_time_ms
-        )
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
+
+        # Queue failed request for the background database writer
+        request_writer.enqueue({
+            'operation': "fibonacci",
+            'input_data': input_data,
+            'success': False,
+            'error_message': str(e),
+            'execution_time_ms': execution_time_ms
+        })
 
         # Re-raise to let exception handlers deal with it
         raise
 
 
 @router.post("/factorial", response_model=MathResponse)
-async def calculate_factorial(request: FactorialRequest, db: AsyncSession = Depends(get_db)):
+async def calculate_factorial(request: FactorialRequest):
     """
     Calculate factorial of n
 
@@ -145,22 +150,21 @@ async def calculate_factorial(request: FactorialRequest, db: AsyncSession = Depe
         {"n": 5}
         Returns: {"operation": "factorial", "input_values": {"n": 5}, "result": 120, "success": true}
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     input_data = {"n": request.n}
 
     try:
         result = math_controller.calculate_factorial(request.n)
-        execution_time_ms = (time.time() - start_time) * 1000
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
 
-        # Save to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="factorial",
-            input_data=input_data,
-            result=result,
-            success=True,
-            execution_time_ms=execution_time_ms
-        )
+        # Queue for the background database writer
+        request_writer.enqueue({
+            'operation': "factorial",
+            'input_data': input_data,
+            'result': result,
+            'success': True,
+            'execution_time_ms': execution_time_ms
+        })
 
         api_logger.info("Factorial calculation successful", extra={
             'n': request.n,
@@ -168,23 +172,22 @@ async def calculate_factorial(request: FactorialRequest, db: AsyncSession = Depe
             'execution_time_ms': round(execution_time_ms, 3)
         })
 
-        return MathResponse(
+        return MathResponse.model_construct(
             operation="factorial",
             input_values=input_data,
             result=result
         )
     except Exception as e:
-        execution_time_ms = (time.time() - start_time) * 1000
-
-        # Save failed request to database
-        await DatabaseController.save_api_request(
-            db=db,
-            operation="factorial",
-            input_data=input_data,
-            success=False,
-            error_message=str(e),
-            execution_time_ms=execution_time_ms
-        )
+        execution_time_ms = (time.perf_counter() - start_time) * 1000
+
+        # Queue failed request for the background database writer
+        request_writer.enqueue({
+            'operation': "factorial",
+            'input_data': input_data,
+            'success': False,
+            'error_message': str(e),
+            'execution_time_ms': execution_time_ms
+        })
 
         # Re-raise to let exception handlers deal with it
         raise
@@ -195,7 +198,8 @@ async def get_request_history(
     operation: Optional[str] = Query(None, description="Filter by operation type"),
     page: int = Query(1, ge=1, description="Page number (1-based)"),
     page_size: int = Query(20, ge=1, le=100, description="Number of records per page"),
-    db: AsyncSession = Depends(get_db)
+    before_id: Optional[int] = Query(None, description="Cursor: return records older than this request id"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get API request history with pagination and filtering
@@ -204,6 +208,7 @@ async def get_request_history(
         - operation: Filter by operation type (power, fibonacci, factorial)
         - page: Page number (default: 1)
         - page_size: Records per page (default: 20, max: 100)
+        - before_id: Keyset cursor, pass the previous page's next_cursor (page is then ignored)
     """
     offset = (page - 1) * page_size
 
@@ -212,36 +217,37 @@ async def get_request_history(
         db=db,
         operation=operation,
         limit=page_size,
-        offset=offset
+        offset=offset,
+        before_id=before_id
     )
+    total_records = await DatabaseController.count_api_requests(db=db, operation=operation)
 
-    # Convert to response format
-    request_history = []
-    for req in requests:
-        request_history.append(ApiRequestHistory(
+    # Rows come straight from the database, so skip re-validating them
+    request_history = [
+        ApiRequestHistory.model_construct(
             id=req.id,
             operation=req.operation,
             input_data=req.input_data,
-            result=req.result,
+            result=DatabaseController.parse_result(req.result),
             success=req.success,
             error_message=req.error_message,
             timestamp=req.timestamp.isoformat(),
             execution_time_ms=req.execution_time_ms
-        ))
-
-    # For simplicity, we'll use the number of returned records
-    total_records = len(request_history)
+        )
+        for req in requests
+    ]
 
     return HistoryResponse(
         total_records=total_records,
         page=page,
         page_size=page_size,
-        requests=request_history
+        requests=request_history,
+        next_cursor=request_history[-1].id if len(request_history) == page_size else None
     )
 
 
 @router.get("/stats", response_model=List[OperationStatsResponse])
-async def get_operation_statistics(db: AsyncSession = Depends(get_db)):
+async def get_operation_statistics(db: AsyncSession = Depends(get_read_db)):
     """
     Get operation statistics
 
@@ -253,30 +259,36 @@ async def get_operation_statistics(db: AsyncSession = Depends(get_db)):
     """
     stats = await DatabaseController.get_operation_stats(db)
 
-    response = []
-    for stat in stats:
-        success_rate = (stat.successful_requests / stat.total_requests * 100) if stat.total_requests > 0 else 0
-        response.append(OperationStatsResponse(
+    # Rows come straight from the database, so skip re-validating them
+    return [
+        OperationStatsResponse.model_construct(
             operation=stat.operation,
             total_requests=stat.total_requests,
             successful_requests=stat.successful_requests,
             failed_requests=stat.failed_requests,
-            success_rate=round(success_rate, 2),
+            success_rate=(
+                round(stat.successful_requests / stat.total_requests * 100, 2) if stat.total_requests > 0 else 0
+            ),
             avg_execution_time_ms=round(stat.avg_execution_time_ms, 3),
             last_updated=stat.last_updated.isoformat()
-        ))
-
-    return response
+        )
+        for stat in stats
+    ]
 
 
-@router.get("/cache/stats")
-async def get_cache_statistics():
+@router.get("/cache/stats", response_class=ORJSONResponse)
+async def get_cache_statistics(request: Request, response: Response):
     """
     Get cache performance statistics
 
-    Returns detailed information about cache hits, misses, and performance metrics
+    Returns detailed information about cache hits, misses, and performance metrics.
+    Sends a weak ETag over the cache counters; a matching If-None-Match gets a 304.
     """
     stats = math_cache.get_stats()
+    etag = 'W/"{hits}-{misses}-{sets}-{deletes}-{current_size}"'.format(**stats)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
 
     api_logger.info("Cache stats requested", extra=stats)
 
@@ -286,7 +298,7 @@ async def get_cache_statistics():
     }
 
 
-@router.get("/cache/info")
+@router.get("/cache/info", response_class=ORJSONResponse)
 async def get_cache_info():
     """
     Get detailed cache information including sample keys
@@ -301,7 +313,7 @@ async def get_cache_info():
     return info
 
 
-@router.post("/cache/clear")
+@router.post("/cache/clear", response_class=ORJSONResponse)
 async def clear_cache():
     """
     Clear all cached results
@@ -326,7 +338,7 @@ async def clear_cache():
     }
 
 
-@router.delete("/cache/{operation}")
+@router.delete("/cache/{operation}", response_class=ORJSONResponse)
 async def clear_operation_cache(operation: str):
     """
     Clear cache for a specific operation type
@@ -337,23 +349,21 @@ async def clear_operation_cache(operation: str):
             detail=f"Invalid operation. Must be one of: power, fibonacci, factorial"
         )
 
-    # For simplicity, we'll clear the entire cache
-    old_size = len(math_cache.cache)
-    math_cache.clear()
+    # Cache keys start with the operation name, so only its entries are removed
+    items_removed = math_cache.clear_operation(operation)
 
     api_logger.info("Operation cache cleared", extra={
         'operation': operation,
-        'items_removed': old_size
+        'items_removed': items_removed
     })
 
     return {
         "message": f"Cache cleared for operation: {operation}",
-        "items_removed": old_size,
-        "note": "Currently clears entire cache - implement selective clearing for production"
+        "items_removed": items_removed
     }
 
 
 @router.get("/health")
 async def health_check():
     """Simple health check endpoint"""
-    return {"status": "healthy", "service": "math-microservice"}
\ No newline at end of file
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
\ No newline at end of file
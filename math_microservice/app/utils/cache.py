@@ -1,134 +1,120 @@
 """
 Caching system for mathematical operations
 """
-import hashlib
-import json
+import asyncio
+import logging
 import time
-from typing import Any, Optional, Dict, Union
-from cachetools import TTLCache
+from typing import Any, Optional, Dict, Union, Hashable, Tuple
 from app.utils.logger import cache_logger
 
 
 class MathCache:
     """
     In-memory cache for mathematical operations with TTL (Time-To-Live)
+
+    Entries live in a plain dict as (result, expires_at). Lookups treat expired
+    entries as misses; a background sweeper task prunes them periodically, and
+    the oldest entry is evicted when the cache is full.
     """
 
-    def __init__(self, maxsize: int = 1000, ttl: int = 300):  # 5 minutes TTL
+    def __init__(self, maxsize: int = 1000, ttl: int = 300, sweep_interval: float = 30.0):  # 5 minutes TTL
         """
         Initialize cache
 
         Args:
             maxsize: Maximum number of cached items
             ttl: Time-to-live in seconds
+            sweep_interval: Seconds between expired-entry sweeps
         """
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'deletes': 0,
-            'size': 0
-        }
+        self.cache: Dict[Hashable, Tuple[Union[int, float], float]] = {}
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[asyncio.Task] = None
+        # Counters are plain attributes; get_stats() assembles the dict on demand
+        # (size is read from len(self.cache) when needed)
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
         self.start_time = time.time()
         cache_logger.info("Cache initialized", extra={
             'maxsize': maxsize,
             'ttl_seconds': ttl
         })
 
-    def _generate_key(self, operation: str, params: Dict[str, Any]) -> str:
+    def get(self, key: Hashable) -> Optional[Union[int, float]]:
         """
-        Generate a unique cache key for the operation and parameters
+        Get cached result for a key
 
         Args:
-            operation: Type of mathematical operation
-            params: Operation parameters
-
-        Returns:
-            Unique cache key
-        """
-        # Create a deterministic string from operation and sorted params
-        key_data = {
-            'operation': operation,
-            'params': dict(sorted(params.items()))
-        }
-        key_string = json.dumps(key_data, sort_keys=True)
-
-        # Generate SHA256 hash for consistent key length
-        return hashlib.sha256(key_string.encode()).hexdigest()[:16]
-
-    def get(self, operation: str, params: Dict[str, Any]) -> Optional[Union[int, float]]:
-        """
-        Get cached result for operation and parameters
-
-        Args:
-            operation: Type of mathematical operation
-            params: Operation parameters
+            key: Hashable cache key, e.g. (operation, *params)
 
         Returns:
             Cached result or None if not found
         """
-        key = self._generate_key(operation, params)
-
-        try:
-            result = self.cache[key]
-            self.stats['hits'] += 1
-            cache_logger.debug("Cache hit", extra={
-                'operation': operation,
-                'key': key,
-                'result': result
-            })
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            result = entry[0]
+            self.hits += 1
+            if cache_logger.isEnabledFor(logging.DEBUG):
+                cache_logger.debug("Cache hit", extra={
+                    'operation': key[0],
+                    'key': str(key),
+                    'result': result
+                })
             return result
-        except KeyError:
-            self.stats['misses'] += 1
-            cache_logger.debug("Cache miss", extra={
-                'operation': operation,
-                'key': key
-            })
+        else:
+            self.misses += 1
+            if cache_logger.isEnabledFor(logging.DEBUG):
+                cache_logger.debug("Cache miss", extra={
+                    'operation': key[0],
+                    'key': str(key)
+                })
             return None
 
-    def set(self, operation: str, params: Dict[str, Any], result: Union[int, float]) -> None:
+    def set(self, key: Hashable, result: Union[int, float]) -> None:
         """
-        Cache the result for operation and parameters
+        Cache the result for a key
 
         Args:
-            operation: Type of mathematical operation
-            params: Operation parameters
+            key: Hashable cache key, e.g. (operation, *params)
             result: Operation result to cache
         """
-        key = self._generate_key(operation, params)
-        self.cache[key] = result
-        self.stats['sets'] += 1
-        self.stats['size'] = len(self.cache)
-
-        cache_logger.debug("Cache set", extra={
-            'operation': operation,
-            'key': key,
-            'result': result,
-            'cache_size': self.stats['size']
-        })
+        cache = self.cache
+        if key in cache:
+            del cache[key]  # Re-insert so the entry moves to the back of the eviction order
+        elif len(cache) >= self.maxsize:
+            del cache[next(iter(cache))]  # Evict the oldest entry
+        cache[key] = (result, time.monotonic() + self.ttl)
+        self.sets += 1
+
+        if cache_logger.isEnabledFor(logging.DEBUG):
+            cache_logger.debug("Cache set", extra={
+                'operation': key[0],
+                'key': str(key),
+                'result': result,
+                'cache_size': len(self.cache)
+            })
 
-    def delete(self, operation: str, params: Dict[str, Any]) -> bool:
+    def delete(self, key: Hashable) -> bool:
         """
-        Delete cached result for operation and parameters
+        Delete cached result for a key
 
         Args:
-            operation: Type of mathematical operation
-            params: Operation parameters
+            key: Hashable cache key, e.g. (operation, *params)
 
         Returns:
             True if deleted, False if not found
         """
-        key = self._generate_key(operation, params)
-
         try:
             del self.cache[key]
-            self.stats['deletes'] += 1
-            self.stats['size'] = len(self.cache)
-            cache_logger.debug("Cache delete", extra={
-                'operation': operation,
-                'key': key
-            })
+            self.deletes += 1
+            if cache_logger.isEnabledFor(logging.DEBUG):
+                cache_logger.debug("Cache delete", extra={
+                    'operation': key[0],
+                    'key': str(key)
+                })
             return True
         except KeyError:
             return False
@@ -137,12 +123,81 @@ class MathCache:
         """Clear all cached items"""
         old_size = len(self.cache)
         self.cache.clear()
-        self.stats['size'] = 0
 
         cache_logger.info("Cache cleared", extra={
             'items_removed': old_size
         })
 
+    def clear_operation(self, operation: str) -> int:
+        """
+        Clear cached items for one operation type
+
+        Args:
+            operation: Type of mathematical operation (first element of the key)
+
+        Returns:
+            Number of items removed
+        """
+        keys = [key for key in self.cache.keys() if key[0] == operation]
+        for key in keys:
+            self.cache.pop(key, None)
+        self.deletes += len(keys)
+
+        cache_logger.info("Operation cache cleared", extra={
+            'operation': operation,
+            'items_removed': len(keys)
+        })
+        return len(keys)
+
+    def sweep(self) -> int:
+        """
+        Remove expired entries
+
+        Returns:
+            Number of items removed
+        """
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self.cache.items() if expires_at <= now]
+        for key in expired:
+            self.cache.pop(key, None)
+
+        if expired and cache_logger.isEnabledFor(logging.DEBUG):
+            cache_logger.debug("Cache sweep", extra={
+                'items_removed': len(expired),
+                'cache_size': len(self.cache)
+            })
+        return len(expired)
+
+    async def _sweep_loop(self) -> None:
+        """Sweep expired entries every sweep_interval seconds"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    def start_sweeper(self) -> None:
+        """Start the background sweeper task (call from the running event loop)"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop_sweeper(self) -> None:
+        """Cancel the background sweeper task"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def hm(self) -> Tuple[int, int]:
+        """
+        Get the raw hit and miss counters without building the stats dict
+
+        Returns:
+            Tuple of (hits, misses)
+        """
+        return self.hits, self.misses
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics
@@ -150,48 +205,41 @@ class MathCache:
         Returns:
             Dictionary with cache statistics
         """
-        total_requests = self.stats['hits'] + self.stats['misses']
-        hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+        total_requests = self.hits + self.misses
+        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
         uptime_seconds = time.time() - self.start_time
 
         return {
-            'hits': self.stats['hits'],
-            'misses': self.stats['misses'],
+            'hits': self.hits,
+            'misses': self.misses,
             'hit_rate_percent': round(hit_rate, 2),
-            'sets': self.stats['sets'],
-            'deletes': self.stats['deletes'],
+            'sets': self.sets,
+            'deletes': self.deletes,
             'current_size': len(self.cache),
-            'max_size': self.cache.maxsize,
-            'ttl_seconds': self.cache.ttl,
+            'max_size': self.maxsize,
+            'ttl_seconds': self.ttl,
             'uptime_seconds': round(uptime_seconds, 2)
         }
 
     def get_cache_info(self) -> Dict[str, Any]:
         """Get detailed cache information including stored keys"""
         keys_info = []
-        current_time = time.time()
+        now = time.monotonic()
 
         # Get sample keys (limit to first 10 for performance)
-        sample_keys = list(self.cache.keys())[:10]
-
-        for key in sample_keys:
-            try:
-                # TTLCache doesn't have expire_time method, so we'll calculate it differently
-                # We can't get exact expiration time, so we'll just show if key exists
-                keys_info.append({
-                    'key': key,
-                    'value': str(self.cache[key])[:50] + "..." if len(str(self.cache[key])) > 50 else str(self.cache[key]),
-                    'status': 'active'
-                })
-            except KeyError:
-                # Key might have expired between getting the list and accessing it
-                continue
+        for key, (value, expires_at) in list(self.cache.items())[:10]:
+            value = str(value)
+            keys_info.append({
+                'key': str(key),
+                'value': value[:50] + "..." if len(value) > 50 else value,
+                'status': 'active' if expires_at > now else 'expired',
+                'expires_in_seconds': round(max(expires_at - now, 0), 2)
+            })
 
         return {
             'stats': self.get_stats(),
             'sample_keys': keys_info,
-            'total_keys': len(self.cache),
-            'note': 'TTL expiration times not available with current cache implementation'
+            'total_keys': len(self.cache)
         }
 
 
@@ -0,0 +1,135 @@
+"""
+Background writer that batches API request records into the database
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from app.controllers.database_controller import DatabaseController
+from app.database import AsyncSessionLocal
+from app.utils.logger import db_logger
+
+# Queue marker telling the writer to flush and exit
+_STOP = object()
+
+
+class RequestWriter:
+    """
+    Fire-and-forget persistence for API requests
+
+    Routes enqueue records and return immediately; a single background task
+    drains the queue and writes each batch in one round-trip (executemany,
+    or COPY for large batches on Postgres).
+    """
+
+    def __init__(self, maxsize: int = 10000, batch_size: int = 500, flush_interval: float = 0.05):
+        """
+        Initialize writer
+
+        Args:
+            maxsize: Maximum number of queued records before the oldest are dropped
+            batch_size: Maximum number of records written per transaction
+            flush_interval: Seconds to wait for a batch to fill before writing it
+        """
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    def start(self) -> None:
+        """Create the queue and start the writer task (call from the running event loop)"""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run())
+        self._running = True
+        db_logger.info("Request writer started", extra={
+            'queue_size': self.maxsize,
+            'batch_size': self.batch_size,
+            'flush_interval_seconds': self.flush_interval
+        })
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the writer task"""
+        if not self._running:
+            return
+        self._running = False
+        self._put(_STOP)
+        await self._task
+        self._task = None
+        db_logger.info("Request writer stopped", extra={'records_dropped': self.dropped})
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a request record for the next batch
+
+        Args:
+            record: Request dictionary as accepted by DatabaseController.save_api_requests_bulk
+        """
+        if not self._running:
+            db_logger.warning("Request writer not running - record dropped", extra={
+                'operation': record.get('operation')
+            })
+            return
+        self._put(record)
+
+    def _put(self, item: Any) -> None:
+        """Put without blocking, dropping the oldest record when the queue is full"""
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._queue.get_nowait()
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                db_logger.warning("Request writer queue full - dropping oldest records", extra={
+                    'records_dropped': self.dropped
+                })
+            self._queue.put_nowait(item)
+
+    async def _run(self) -> None:
+        """Collect up to batch_size records or flush_interval seconds worth, then write them"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Write one batch; failures are logged so the writer keeps running"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await DatabaseController.save_api_requests_bulk(db, batch)
+        except Exception as e:
+            db_logger.error("Failed to write request batch", extra={
+                'error': str(e),
+                'batch_size': len(batch)
+            }, exc_info=True)
+
+
+# Global writer instance
+request_writer = RequestWriter()
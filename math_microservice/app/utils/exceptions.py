@@ -71,22 +71,18 @@ async def cache_exception_handler(request: Request, exc: CacheError) -> JSONResp
 
 async def validation_exception_handler(request: Request, exc: Union[ValidationError, RequestValidationError]) -> JSONResponse:
     """Handle Pydantic validation errors with detailed messages"""
-    errors = []
-
     # Handle both ValidationError and RequestValidationError
-    if hasattr(exc, 'errors'):
-        error_details = exc.errors()
-    else:
-        error_details = []
-
-    for error in error_details:
-        field = " -> ".join(str(loc) for loc in error.get("loc", []))
-        errors.append({
-            "field": field,
+    error_details = exc.errors() if hasattr(exc, 'errors') else []
+
+    errors = [
+        {
+            "field": " -> ".join(map(str, error.get("loc", ()))),
             "message": error.get("msg", "Validation error"),
             "invalid_value": error.get("input", "N/A"),
             "error_type": error.get("type", "validation_error")
-        })
+        }
+        for error in error_details
+    ]
 
     app_logger.warning("Validation error", extra={
         'errors': errors,
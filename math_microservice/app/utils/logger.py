@@ -2,10 +2,16 @@
 Logging configuration for the math microservice
 """
 import logging
+import queue
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any
 from pythonjsonlogger import jsonlogger
-from datetime import datetime
+
+# (epoch second, formatted UTC second) - the date/time part is formatted at most once per second.
+# Replaced as a whole tuple so concurrent formatters never see a mismatched pair.
+_ts_cache = (-1, '')
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
@@ -14,9 +20,16 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
     def add_fields(self, log_record: Dict[str, Any], record: logging.LogRecord, message_dict: Dict[str, Any]):
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
 
-        # Add timestamp
+        # Add timestamp - taken from record creation, since formatting runs later on the listener thread
         if not log_record.get('timestamp'):
-            log_record['timestamp'] = datetime.utcnow().isoformat()
+            global _ts_cache
+            created = record.created
+            second = int(created)
+            cached_second, formatted = _ts_cache
+            if cached_second != second:
+                formatted = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+                _ts_cache = (second, formatted)
+            log_record['timestamp'] = f"{formatted}.{int((created - second) * 1e6):06d}"
 
         # Add service info
         log_record['service'] = 'math-microservice'
@@ -28,10 +41,50 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
             log_record['line'] = record.lineno
 
 
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that hands records over untouched - formatting happens in the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same-process queue: no need to pre-format or strip exc_info for pickling
+        return record
+
+
+# Records from every logger go through this queue; JSON formatting and stdout
+# writes happen on the listener thread, off the request path
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(CustomJsonFormatter(
+    fmt='%(timestamp)s %(level)s %(name)s %(message)s'
+))
+
+_listener = QueueListener(log_queue, _stream_handler, respect_handler_level=True)
+_listener_running = False
+
+
+def start_log_listener() -> None:
+    """Start the background thread that formats and writes queued log records"""
+    global _listener_running
+    if not _listener_running:
+        _listener.start()
+        _listener_running = True
+
+
+def stop_log_listener() -> None:
+    """Flush pending log records and stop the listener thread"""
+    global _listener_running
+    if _listener_running:
+        _listener.stop()
+        _listener_running = False
+
+
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     """
     Set up a logger with JSON formatting
 
+    The logger only enqueues records; start_log_listener() must be running
+    for them to be written.
+
     Args:
         name: Logger name
         level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -49,16 +102,10 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     log_level = getattr(logging, level.upper(), logging.INFO)
     logger.setLevel(log_level)
 
-    # Create console handler
-    handler = logging.StreamHandler(sys.stdout)
+    # Enqueue only - the shared listener does the formatting and I/O
+    handler = _DeferredQueueHandler(log_queue)
     handler.setLevel(log_level)
 
-    # Create JSON formatter
-    formatter = CustomJsonFormatter(
-        fmt='%(timestamp)s %(level)s %(name)s %(message)s'
-    )
-    handler.setFormatter(formatter)
-
     logger.addHandler(handler)
     logger.propagate = False
 
@@ -1,23 +1,45 @@
 """
 Custom middleware for logging and performance monitoring
 """
+import itertools
+import os
 import time
-import uuid
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.utils.logger import api_logger, performance_logger
 
+# Request IDs: per-process counter, prefixed with the pid so IDs stay unique across workers
+_request_counter = itertools.count(1)
+_REQUEST_ID_PREFIX = format(os.getpid(), "x") + "-"
+
+
+def _reset_request_ids() -> None:
+    """Give a forked worker its own prefix and counter"""
+    global _request_counter, _REQUEST_ID_PREFIX
+    _request_counter = itertools.count(1)
+    _REQUEST_ID_PREFIX = format(os.getpid(), "x") + "-"
+
+
+os.register_at_fork(after_in_child=_reset_request_ids)
+
+# Exact paths of the cached math operation endpoints
+_MATH_OPS = frozenset({
+    "/api/v1/math/power",
+    "/api/v1/math/fibonacci",
+    "/api/v1/math/factorial",
+})
+
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware to log all requests and responses with performance metrics"""
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Generate unique request ID
-        request_id = str(uuid.uuid4())[:8]
+        request_id = _REQUEST_ID_PREFIX + format(next(_request_counter), "x")
 
         # Start timing
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Get client info
         client_ip = request.client.host if request.client else "unknown"
@@ -42,7 +64,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         # Process request
         try:
             response = await call_next(request)
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
 
             # Log successful response
             api_logger.info("Request completed", extra={
@@ -71,7 +93,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             return response
 
         except Exception as e:
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
 
             # Log failed request
             api_logger.error("Request failed", extra={
@@ -92,37 +114,32 @@ class CacheMetricsMiddleware(BaseHTTPMiddleware):
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Only monitor math operation endpoints
-        if not request.url.path.startswith("/api/v1/math/"):
-            return await call_next(request)
-
-        # Skip non-math operations
-        operation_endpoints = ["/power", "/fibonacci", "/factorial"]
-        if not any(endpoint in request.url.path for endpoint in operation_endpoints):
+        if request.url.path not in _MATH_OPS:
             return await call_next(request)
 
         # Import here to avoid circular imports
         from app.utils.cache import math_cache
 
-        # Get cache stats before request
-        stats_before = math_cache.get_stats()
+        # Only the raw counters are needed to detect a cache access
+        hits_before, misses_before = math_cache.hm()
 
         # Process request
         response = await call_next(request)
 
-        # Get cache stats after request
-        stats_after = math_cache.get_stats()
+        hits_after, misses_after = math_cache.hm()
 
-        # Log cache metrics if there was a change
-        if stats_after['hits'] != stats_before['hits'] or stats_after['misses'] != stats_before['misses']:
-            cache_action = "hit" if stats_after['hits'] > stats_before['hits'] else "miss"
+        # Build the full stats and log only if there was a change
+        if hits_after != hits_before or misses_after != misses_before:
+            cache_action = "hit" if hits_after > hits_before else "miss"
+            stats_after = math_cache.get_stats()
 
             from app.utils.logger import cache_logger
             cache_logger.info("Cache metrics", extra={
                 'request_id': getattr(request.state, 'request_id', 'unknown'),
                 'endpoint': request.url.path,
                 'cache_action': cache_action,
-                'total_hits': stats_after['hits'],
-                'total_misses': stats_after['misses'],
+                'total_hits': hits_after,
+                'total_misses': misses_after,
                 'hit_rate_percent': stats_after['hit_rate_percent'],
                 'cache_size': stats_after['current_size']
             })
@@ -0,0 +1,21 @@
+"""
+Response classes for fast JSON serialization
+"""
+import orjson
+from typing import Any
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    orjson cannot encode integers wider than 64 bits (large fibonacci and
+    factorial results), so those payloads fall back to the stdlib encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(content)
@@ -0,0 +1,24 @@
+"""
+pytest configuration for the live-server test scripts
+
+The test modules still run as plain scripts (python test_*.py). Under pytest
+they receive the shared pooled session through the client fixture, and the
+whole run is skipped when no server is listening.
+"""
+import pytest
+from _client import preflight, session
+
+
+@pytest.fixture(scope="session", autouse=True)
+def live_server():
+    """Skip every test when the API is not reachable"""
+    try:
+        preflight()
+    except SystemExit as e:  # preflight exits with the reason when the health check fails
+        pytest.skip(str(e))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The pooled requests.Session from _client, shared by all test modules"""
+    return session
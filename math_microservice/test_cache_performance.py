@@ -1,17 +1,33 @@
+import asyncio
+import random
 import requests
-import time
-import statistics
-
-base_url = "http://127.0.0.1:8000/api/v1/math"
-
-
-def test_cache_performance_detailed():
+from unittest import mock
+from app.controllers import math_controller
+from app.utils.cache import MathCache
+from _bench import latency_summary, measure, print_measure, server_ms, timed_post, timed_posts
+from _client import (
+    BASE_URL as base_url, cache_delta, encode_body, preflight,
+    print_cache_delta, session, snapshot_stats, warm_up
+)
+
+TRIALS = 50  # Requests per phase - enough for stable p95/p99
+SHOWN_TRIALS = 3  # Successful trials printed individually per phase
+
+# Workload streams are replayed in-process against a small MathCache; sizes are multiples of its
+# max_size, so every pattern runs under eviction pressure
+WORKLOAD_CACHE_SIZE = 250
+WORKLOAD_REQUESTS_FACTOR = 2  # Requests per workload pattern
+WORKLOAD_KEYS_FACTOR = 4  # Distinct hot keys (base k, exponent 2)
+
+
+def test_cache_performance_detailed(client):
     """Test cache performance with statistical analysis"""
     print("Detailed Cache Performance Analysis")
     print("=" * 50)
 
     # Clear cache to start fresh
-    requests.post(f"{base_url}/cache/clear")
+    client.post(f"{base_url}/cache/clear")
+    warm_up()
     print("Cache cleared - starting fresh\n")
 
     test_cases = [
@@ -39,99 +55,108 @@ def test_cache_performance_detailed():
         endpoint = f"{base_url}/{case['endpoint']}"
         miss_times = []
         hit_times = []
+        stats_before = snapshot_stats()
 
-        # Test cache miss (first request)
+        # Test cache miss (first request) - clear once, then vary the input so every trial misses
         print("Cache Miss Tests (first calculation):")
-        for i in range(3):
-            # Clear cache before each miss test
-            requests.post(f"{base_url}/cache/clear")
-
-            start = time.time()
-            response = requests.post(endpoint, json=case['data'])
-            end = time.time()
-
+        client.post(f"{base_url}/cache/clear")
+        first_field, first_value = next(iter(case['data'].items()))
+        bodies = [encode_body({**case['data'], first_field: first_value + i}) for i in range(TRIALS)]
+        rows = []  # Printed after the loop so no stdout I/O lands between timed samples
+        for i, body in enumerate(bodies):
+            rows.append((i, *timed_post(client, endpoint, body)))
+
+        for i, response, end_to_end in rows:
             if response.status_code == 200:
-                miss_time = (end - start) * 1000
+                # Server-side time excludes network and client overhead
+                miss_time = server_ms(response)
                 miss_times.append(miss_time)
-                result = response.json()['result']
-                print(f"  Miss #{i + 1}: {miss_time:.2f}ms -> Result: {result}")
+                if i < SHOWN_TRIALS:
+                    result = response.json()['result']
+                    print(f"  Miss #{i + 1}: {miss_time:.3f}ms server ({end_to_end:.2f}ms end-to-end) -> Result: {result}")
             else:
                 print(f"  Miss #{i + 1}: FAILED ({response.status_code})")
+        print(f"  ... {len(miss_times)}/{TRIALS} misses succeeded")
+        assert len(miss_times) == TRIALS, "cache-miss requests failed"
 
-        # Test cache hits (subsequent requests)
+        # Test cache hits (subsequent requests) - timed one at a time, like the misses, so the
+        # comparison below is not skewed by requests queueing behind each other
         print("Cache Hit Tests (cached results):")
-        for i in range(3):
-            start = time.time()
-            response = requests.post(endpoint, json=case['data'])
-            end = time.time()
-
+        body = bodies[0]  # Same payload as the first miss, so every repeat is a hit
+        rows = [timed_post(client, endpoint, body) for _ in range(TRIALS)]
+        for i, (response, end_to_end) in enumerate(rows):
             if response.status_code == 200:
-                hit_time = (end - start) * 1000
+                hit_time = server_ms(response)
                 hit_times.append(hit_time)
-                result = response.json()['result']
-                print(f"  Hit #{i + 1}: {hit_time:.2f}ms -> Result: {result}")
+                if i < SHOWN_TRIALS:
+                    result = response.json()['result']
+                    print(f"  Hit #{i + 1}: {hit_time:.3f}ms server ({end_to_end:.2f}ms end-to-end) -> Result: {result}")
             else:
                 print(f"  Hit #{i + 1}: FAILED ({response.status_code})")
+        print(f"  ... {len(hit_times)}/{TRIALS} hits succeeded")
+        assert len(hit_times) == TRIALS, "cache-hit requests failed"
+
+        # Concurrent burst of the same hit - a throughput figure only; per-request times in a
+        # burst include event-loop queueing, so they stay out of the miss/hit comparison
+        burst_results, burst_time = asyncio.run(timed_posts(f"/{case['endpoint']}", case['data'], TRIALS))
+        burst_ok = sum(response.status_code == 200 for response, _ in burst_results)
+        print(f"  Concurrent burst: {burst_ok}/{len(burst_results)} in {burst_time:.2f}ms "
+              f"({len(burst_results) / burst_time * 1000:.0f} req/s over {burst_results[0][0].http_version})")
+        assert burst_ok == len(burst_results), "burst requests failed"
 
         # Statistical analysis
-        if miss_times and hit_times:
-            avg_miss = statistics.mean(miss_times)
-            avg_hit = statistics.mean(hit_times)
+        if len(miss_times) > 1 and len(hit_times) > 1:
+            avg_miss, p50_miss, p95_miss, p99_miss = latency_summary(miss_times)
+            avg_hit, p50_hit, p95_hit, p99_hit = latency_summary(hit_times)
             improvement = ((avg_miss - avg_hit) / avg_miss) * 100
 
-            print(f"\nPerformance Analysis:")
-            print(f"  Average Miss Time: {avg_miss:.2f}ms")
-            print(f"  Average Hit Time:  {avg_hit:.2f}ms")
+            print(f"\nPerformance Analysis (server-side ms):")
+            print(f"  Miss: mean={avg_miss:.3f} p50={p50_miss:.3f} p95={p95_miss:.3f} p99={p99_miss:.3f}")
+            print(f"  Hit:  mean={avg_hit:.3f} p50={p50_hit:.3f} p95={p95_hit:.3f} p99={p99_hit:.3f}")
             print(f"  Performance Improvement: {improvement:.1f}%")
 
             if improvement > 0:
                 print(f"  Cache is working! {improvement:.1f}% faster")
-            else:
-                print(f"  Negative improvement - network/overhead effects")
+        print_cache_delta(stats_before, snapshot_stats())
 
         print("\n")
 
 
-def test_cache_statistics():
+def test_cache_statistics(client):
     """Test cache statistics and management"""
     print("Cache Statistics & Management")
     print("=" * 50)
 
     # Get initial stats
-    response = requests.get(f"{base_url}/cache/stats")
-    if response.status_code == 200:
-        stats = response.json()['cache_statistics']
-        print(f"Initial Cache Stats:")
-        print(f"  Total Requests: {stats['hits'] + stats['misses']}")
-        print(f"  Hit Rate: {stats['hit_rate_percent']}%")
-        print(f"  Cache Size: {stats['current_size']}/{stats['max_size']}")
-        print(f"  Uptime: {stats['uptime_seconds']:.1f}s")
+    response = client.get(f"{base_url}/cache/stats")
+    assert response.status_code == 200
+    stats = response.json()['cache_statistics']
+    print(f"Initial Cache Stats:")
+    print(f"  Total Requests: {stats['hits'] + stats['misses']}")
+    print(f"  Hit Rate: {stats['hit_rate_percent']}%")
+    print(f"  Cache Size: {stats['current_size']}/{stats['max_size']}")
+    print(f"  Uptime: {stats['uptime_seconds']:.1f}s")
 
     # Test cache info endpoint
     print(f"\nTesting Cache Info Endpoint:")
-    response = requests.get(f"{base_url}/cache/info")
-    if response.status_code == 200:
-        info = response.json()
-        print(f"  Cache Info endpoint working")
-        print(f"  Sample Keys: {len(info['sample_keys'])}")
-        if info['sample_keys']:
-            print(f"  First Key Preview: {info['sample_keys'][0]}")
-    else:
-        print(f"  Cache Info endpoint failed: {response.status_code}")
-        print(f"  Error: {response.text[:200]}")
+    response = client.get(f"{base_url}/cache/info")
+    assert response.status_code == 200, f"cache info failed: {response.status_code} {response.text[:200]}"
+    info = response.json()
+    print(f"  Cache Info endpoint working")
+    print(f"  Sample Keys: {len(info['sample_keys'])}")
+    if info['sample_keys']:
+        print(f"  First Key Preview: {info['sample_keys'][0]}")
 
     # Test cache clearing
     print(f"\nTesting Cache Clear:")
-    response = requests.post(f"{base_url}/cache/clear")
-    if response.status_code == 200:
-        result = response.json()
-        print(f"  Cache cleared: {result['message']}")
-        print(f"  Items removed: {result['items_removed']}")
-    else:
-        print(f"  Cache clear failed: {response.status_code}")
+    response = client.post(f"{base_url}/cache/clear")
+    assert response.status_code == 200, f"cache clear failed: {response.status_code}"
+    result = response.json()
+    print(f"  Cache cleared: {result['message']}")
+    print(f"  Items removed: {result['items_removed']}")
 
 
-def test_complex_calculations():
+def test_complex_calculations(client):
     """Test caching with more complex calculations that show clear benefits"""
     print("Complex Calculation Cache Benefits")
     print("=" * 50)
@@ -144,45 +169,91 @@ def test_complex_calculations():
     ]
 
     # Clear cache
-    requests.post(f"{base_url}/cache/clear")
+    client.post(f"{base_url}/cache/clear")
 
     for test in complex_tests:
         print(f"\nTesting {test['name']}:")
-        endpoint = f"{base_url}/{test['endpoint']}"
-
-        # First request (cache miss)
-        print("  Computing for first time...")
-        start = time.time()
-        response1 = requests.post(endpoint, json=test['data'])
-        miss_time = (time.time() - start) * 1000
-
-        if response1.status_code == 200:
-            result = response1.json()['result']
-            print(f"  First calculation: {miss_time:.2f}ms -> {result}")
-
-            # Second request (cache hit)
-            print("  Retrieving from cache...")
-            start = time.time()
-            response2 = requests.post(endpoint, json=test['data'])
-            hit_time = (time.time() - start) * 1000
-
-            if response2.status_code == 200:
-                print(f"  Cached retrieval: {hit_time:.2f}ms -> {response2.json()['result']}")
-                improvement = ((miss_time - hit_time) / miss_time) * 100
-                print(f"  Speed improvement: {improvement:.1f}%")
-            else:
-                print(f"  Cache retrieval failed: {response2.status_code}")
-        else:
-            print(f"  Calculation failed: {response1.status_code} - {response1.text}")
+        m = measure(client, base_url, test['endpoint'], test['data'], n_hits=1)
+
+        print_measure(m)
+
+        assert m.ok, f"{test['name']} failed: {m.status_code}"
+        assert len(m.hit_ms) == 1, f"{test['name']} repeat request failed"
+
+
+def workload_patterns(rng, max_size):
+    """Key streams for the cache workload test: name -> list of power payloads"""
+    requests_per_pattern = WORKLOAD_REQUESTS_FACTOR * max_size
+    key_space = WORKLOAD_KEYS_FACTOR * max_size
+
+    def hot(k):
+        return {"base": k + 2, "exponent": 2}
+
+    def scan(j):
+        return {"base": 10 ** 6 + j, "exponent": 1}  # Never repeated - pure cache pollution
+
+    zipf_weights = [1 / (k + 1) for k in range(key_space)]  # zipf(1.0)
+
+    # Bursts of zipf hot traffic, each followed by a one-off scan slightly larger than the cache
+    scanned = []
+    while len(scanned) < requests_per_pattern:
+        scanned += [hot(k) for k in rng.choices(range(key_space), weights=zipf_weights, k=max_size // 4)]
+        scanned += [scan(len(scanned) + j) for j in range(max_size + max_size // 10)]
+
+    return {
+        "zipf": [hot(k) for k in rng.choices(range(key_space), weights=zipf_weights, k=requests_per_pattern)],
+        "uniform": [hot(rng.randrange(key_space)) for _ in range(requests_per_pattern)],
+        # Loops over slightly more keys than the cache holds - each key is evicted before it comes round again
+        "sequential": [hot(i % (max_size + max_size // 5)) for i in range(requests_per_pattern)],
+        "scan": scanned[:requests_per_pattern],
+    }
+
+
+def test_workload_patterns():
+    """
+    Measure the cache hit ratio under zipf, uniform, sequential and scan key streams
+
+    Hit ratio depends only on the key stream and the eviction policy, so the streams go through
+    MathController.calculate_power with a small MathCache patched in instead of the server. That
+    keeps the run short and writes no history rows.
+    """
+    print("Cache Workload Patterns")
+    print("=" * 50)
+
+    max_size = WORKLOAD_CACHE_SIZE
+    results = {}
+    for name, payloads in workload_patterns(random.Random(42), max_size).items():
+        # Hit ratio an unbounded cache would reach: every repeat of a key is a hit
+        unbounded = 1 - len({(data['base'], data['exponent']) for data in payloads}) / len(payloads)
+        cache = MathCache(maxsize=max_size)
+        stats_before = cache.get_stats()
+        with mock.patch.object(math_controller, "math_cache", cache):
+            for data in payloads:
+                math_controller.MathController.calculate_power(data['base'], data['exponent'])
+        delta = cache_delta(stats_before, cache.get_stats())
+        results[name] = (delta if delta else (0.0, 1.0)) + (unbounded,)
+
+    print(f"  {'Workload':<12}{'Hit ratio':>10}{'Unbounded':>11}{'Speedup':>10}")
+    for name, (hit_ratio, speedup, unbounded) in results.items():
+        print(f"  {name:<12}{hit_ratio:>10.3f}{unbounded:>11.3f}{speedup:>9.2f}x")
+    print(f"  ({WORKLOAD_REQUESTS_FACTOR * max_size} requests each over {WORKLOAD_KEYS_FACTOR * max_size} hot keys, "
+          f"cache max_size {max_size})")
+
+    # Skewed traffic keeps its hot set cached; uniform traffic over 4x the cache size mostly misses,
+    # and scans larger than the cache flush the hot keys out
+    assert results["zipf"][0] > results["uniform"][0] > results["scan"][0]
 
 
 if __name__ == "__main__":
     print("=== Math Microservice Cache Performance Analysis ===\n")
+    preflight()
 
     try:
-        test_cache_performance_detailed()
-        test_cache_statistics()
-        test_complex_calculations()
+        test_cache_performance_detailed(session)
+        test_cache_statistics(session)
+        test_complex_calculations(session)
+        print()
+        test_workload_patterns()
 
         print("\n" + "=" * 50)
         print("Cache Performance Analysis Complete!")
@@ -1,50 +1,107 @@
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from _client import BASE_URL as base_url, decode_json, preflight, session
 
-base_url = "http://127.0.0.1:8000/api/v1/math"
 
-
-def test_operations():
+def test_operations(client):
     """Test all mathematical operations"""
     print("Testing mathematical operations...")
-
-    # Test power
-    response = requests.post(f"{base_url}/power", json={"base": 2, "exponent": 3})
-    print(f"Power: {response.json()}")
-
-    # Test fibonacci
-    response = requests.post(f"{base_url}/fibonacci", json={"n": 10})
-    print(f"Fibonacci: {response.json()}")
-
-    # Test factorial
-    response = requests.post(f"{base_url}/factorial", json={"n": 5})
-    print(f"Factorial: {response.json()}")
-
-    # Test error case
-    response = requests.post(f"{base_url}/factorial", json={"n": -1})
-    print(f"Error case status: {response.status_code}")
-
-
-def test_history():
+    prior_total = total_recorded()
+
+    # (label, endpoint, payload, expected status, expected result)
+    cases = [
+        ("Power", "power", {"base": 2, "exponent": 3}, 200, 8),
+        ("Fibonacci", "fibonacci", {"n": 10}, 200, 55),
+        ("Factorial", "factorial", {"n": 5}, 200, 120),
+        ("Error case", "factorial", {"n": -1}, 422, None),
+    ]
+
+    # The requests are independent, so send them concurrently over the pooled session
+    with ThreadPoolExecutor(max_workers=len(cases)) as executor:
+        futures = [executor.submit(client.post, f"{base_url}/{endpoint}", json=data) for _, endpoint, data, _, _ in cases]
+        responses = [future.result() for future in futures]
+
+    for (label, _, _, status, result), response in zip(cases, responses):
+        if response.status_code == 200:
+            print(f"{label}: {response.json()}")
+        else:
+            print(f"{label} status: {response.status_code}")
+        assert response.status_code == status, label
+        assert response.headers.get('X-Request-ID'), label
+        if status == 200:
+            assert response.json()['result'] == result, label
+
+    # Records are written in the background - wait until they show up.
+    # Requests rejected by input validation (422) never reach the route, so they are not recorded.
+    recorded = sum(response.status_code != 422 for response in responses)
+    assert wait_for_records(prior_total + recorded), "not all records were persisted within 1s"
+
+
+def total_recorded():
+    """Total requests recorded in the operation stats"""
+    return sum(stat['total_requests'] for stat in decode_json(session.get(f"{base_url}/stats")))
+
+
+def wait_for_records(expected, timeout=1.0):
+    """Poll /stats until the background writer has persisted expected requests, up to timeout seconds"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if total_recorded() >= expected:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_history(client):
     """Test history endpoint"""
     print("\nTesting history endpoint...")
 
-    response = requests.get(f"{base_url}/history")
+    response = client.get(f"{base_url}/history")
+    assert response.status_code == 200
     history = response.json()
     print(f"Total records: {history['total_records']}")
     print(f"Number of requests returned: {len(history['requests'])}")
 
-    if history['requests']:
-        latest = history['requests'][0]
-        print(f"Latest request: {latest['operation']} -> {latest['result']}")
+    assert history['requests'], "history is empty"
+    latest = history['requests'][0]
+    print(f"Latest request: {latest['operation']} -> {latest['result']}")
 
 
-def test_stats():
+def test_history_cursor(client, pages=3, page_size=5):
+    """Walk history with the keyset cursor and check it matches one larger page read from the same cursor"""
+    print("\nTesting history cursor pagination...")
+
+    # Anchor both reads at an existing record so rows written meanwhile cannot shift the pages
+    response = client.get(f"{base_url}/history", params={"page_size": 1})
+    assert response.status_code == 200 and response.json()['requests'], "history is empty"
+    anchor = response.json()['requests'][0]['id']
+
+    response = client.get(f"{base_url}/history", params={"page_size": pages * page_size, "before_id": anchor})
+    assert response.status_code == 200
+    expected_ids = [req['id'] for req in response.json()['requests']]
+
+    cursor_ids = []
+    before_id = anchor
+    for _ in range(pages):
+        response = client.get(f"{base_url}/history", params={"page_size": page_size, "before_id": before_id})
+        assert response.status_code == 200
+        cursor_ids += [req['id'] for req in response.json()['requests']]
+        before_id = response.json()['next_cursor']
+        if before_id is None:
+            break
+
+    print(f"Walked {len(cursor_ids)} records older than request {anchor}")
+    assert cursor_ids == expected_ids, "cursor pages disagree with a single read"
+    assert len(set(cursor_ids)) == len(cursor_ids), "cursor pages overlap"
+
+def test_stats(client):
     """Test statistics endpoint"""
     print("\nTesting statistics endpoint...")
 
-    response = requests.get(f"{base_url}/stats")
-    stats = response.json()
+    response = client.get(f"{base_url}/stats")
+    assert response.status_code == 200
+    stats = decode_json(response)
+    assert stats, "no operation stats recorded"
 
     for stat in stats:
         print(f"Operation: {stat['operation']}")
@@ -55,16 +112,15 @@ def test_stats():
 
 if __name__ == "__main__":
     print("=== Math Microservice Database Persistence Test ===")
+    preflight()
 
     # Test operations (this will create database records)
-    test_operations()
-
-    # Small delay to ensure database writes complete
-    time.sleep(0.5)
+    test_operations(session)
 
     # Test history and stats
-    test_history()
-    test_stats()
+    test_history(session)
+    test_history_cursor(session)
+    test_stats(session)
 
     print("\n=== Test completed! ===")
     print("Check your database file: math_microservice.db")
\ No newline at end of file